@@ -4,7 +4,9 @@
 # SPDX-License-Identifier: Apache License 2.0
 
 import argparse
+import concurrent.futures
 import datetime
+import functools
 import os
 import re
 import sys
@@ -13,6 +15,7 @@ import sys
 parser = argparse.ArgumentParser()
 parser.add_argument("files", action="extend", nargs="+", type=str)
 parser.add_argument("--fix-in-place", "-f", action="store_true")
+parser.add_argument("--jobs", type=int, default=os.cpu_count(), help="Number of worker processes")
 parser.add_argument("--license", required=True)
 parser.add_argument("--owner", default="Intel Corporation")
 parser.add_argument("--verbose", "-v", action="store_true")
@@ -22,11 +25,20 @@ YEAR = datetime.datetime.now().year
 COPYRIGHT = f"Copyright © {YEAR} {{owner}}"
 SPDX_LICENSE = "SPDX-License-Identifier: {license}"
 
-DISCLAIMER_RE_LINES = [
-  re.compile(r"^[ *#]*Copyright © [0-9]{4} .*$"),
-  re.compile(r"^[ *#]*$"),
-  re.compile(r"^[ *#]*SPDX-License-Identifier: .*$"),
-]
+COMMENT_CHARS = " *#"
+
+
+def check_copyright_line(line):
+  line = line.lstrip(COMMENT_CHARS)
+  return line.startswith("Copyright © ") and line[12:16].isdigit() and line[16:17] == " "
+
+
+def check_blank_line(line):
+  return not line.lstrip(COMMENT_CHARS)
+
+
+def check_spdx_line(line):
+  return line.lstrip(COMMENT_CHARS).startswith("SPDX-License-Identifier: ")
 
 
 class Filetype:
@@ -66,14 +78,21 @@ COMMENT_LINES = {
 }
 
 
+SUFFIX_TO_FILETYPE = {
+  Filetype.js: Filetype.js,
+  Filetype.less: Filetype.less,
+  Filetype.markdown: Filetype.markdown,
+  Filetype.python: Filetype.python,
+  Filetype.shell: Filetype.shell,
+}
+
+
 def guess_filetype(filename):
-  for filetype in FILETYPES:
-    if filename.endswith(filetype):
-      return filetype
-    # Filenames like "Dockerfile.api" are allowed
-    if os.path.basename(filename).startswith(Filetype.dockerfile):
-      return Filetype.dockerfile
-  return None
+  # Filenames like "Dockerfile.api" are allowed
+  if os.path.basename(filename).startswith(Filetype.dockerfile):
+    return Filetype.dockerfile
+  _, extension = os.path.splitext(filename)
+  return SUFFIX_TO_FILETYPE.get(extension)
 
 
 def generate_disclaimer(filetype, license_, owner):
@@ -91,31 +110,68 @@ def generate_disclaimer(filetype, license_, owner):
   )
 
 
-def file_has_disclaimer(file, filetype):
-  to_check = []
-  line = next(file)
-  if line.startswith("#!"):
-    line = next(file)
-  if line in ("/**\n", "<!--\n"):
-    line = next(file)
-  to_check.append(line)
-  to_check.extend(l for l, _ in zip(file, range(len(DISCLAIMER_RE_LINES) - 1)))
-
-  to_check = "".join(to_check).split("\n")
-  if len(to_check) < len(DISCLAIMER_RE_LINES):
+# One compiled pattern per filetype matching the exact shape generate_disclaimer
+# emits, with the year, owner and license left open. Headers written by the fixer
+# are accepted with a single C-level match instead of line-by-line checks.
+def compile_quick_disclaimer_pattern(filetype):
+  opener, _ = COMMENT_BLOCKS[filetype]
+  separator = COMMENT_LINES[filetype]
+  return re.compile(
+    r"(?:#!.*\n)?"
+    + re.escape(f"{opener}{separator}")
+    + r"Copyright © \d{4} [^\n]*\n"
+    + re.escape(separator.rstrip(" "))
+    + r"\n"
+    + re.escape(separator)
+    + r"SPDX-License-Identifier: [^\n]*\n"
+  )
+
+
+QUICK_DISCLAIMER_PATTERNS = {filetype: compile_quick_disclaimer_pattern(filetype) for filetype in FILETYPES}
+
+
+def file_has_disclaimer_str(content, filetype):
+  if QUICK_DISCLAIMER_PATTERNS[filetype].match(content):
+    return True
+  # Fall back to the permissive per-line checks for headers with extra comment
+  # decoration the quick pattern does not anticipate
+  lines = content.splitlines(keepends=True)
+  index = 0
+  if index < len(lines) and lines[index].startswith("#!"):
+    index += 1
+  if index < len(lines) and lines[index] in ("/**\n", "<!--\n"):
+    index += 1
+  header = lines[index : index + 3]
+  if len(header) < 3:
     return False
+  copyright_line, blank_line, spdx_line = header
+  return (
+    check_copyright_line(copyright_line.rstrip("\n"))
+    and check_blank_line(blank_line.rstrip("\n"))
+    and check_spdx_line(spdx_line.rstrip("\n"))
+  )
+
 
-  return all(regex.match(line) for regex, line in zip(DISCLAIMER_RE_LINES, to_check))
+def file_has_disclaimer(file, filetype):
+  return file_has_disclaimer_str(file.read(), filetype)
+
+
+# The disclaimer lives in the first few lines, so this is plenty to decide either way
+DISCLAIMER_PROBE_SIZE = 512
 
 
 def file_needs_disclaimer(filename, verbose=False):
   filetype = guess_filetype(filename)
-  if not filetype or os.stat(filename).st_size == 0:
+  if not filetype:
     return False
   if verbose:
     print(f"Checking: {filename}")  # noqa: T001
-  with open(filename) as fp:
-    return not file_has_disclaimer(fp, filetype)
+  # A single open+read replaces the separate stat for emptiness plus a full text open
+  with open(filename, "rb") as fp:
+    head = fp.read(DISCLAIMER_PROBE_SIZE)
+  if not head:
+    return False
+  return not file_has_disclaimer_str(head.decode("utf-8", "replace"), filetype)
 
 
 def fix_in_place(file, filetype, license_, owner):
@@ -126,36 +182,42 @@ def fix_in_place(file, filetype, license_, owner):
   file.seek(0)
 
   if maybe_shebang.startswith("#!"):
-    file.write(maybe_shebang + disclaimer + remaining)
+    fixed = maybe_shebang + disclaimer + remaining
   else:
-    file.write(disclaimer + maybe_shebang + remaining)
+    fixed = disclaimer + maybe_shebang + remaining
+  file.write(fixed)
+  return fixed
 
 
 def fix_all(filenames, license_, owner, verbose=False):
   failed_to_fix = []
   for filename in filenames:
     filetype = guess_filetype(filename)
+    fixed = None
     try:
       if verbose:
         print(f"Fixing {filename}")  # noqa: T001
       with open(filename, "r+") as fp:
-        fix_in_place(fp, filetype, license_, owner)
+        fixed = fix_in_place(fp, filetype, license_, owner)
     except Exception as e:
       print(f"failed to fix {filename}: {e}")  # noqa: T001
       failed_to_fix.append(filename)
-    with open(filename) as fp:
-      if not file_has_disclaimer(fp, filetype):
-        print(f"fix did not work for {filename}")  # noqa: T001
-        failed_to_fix.append(filename)
+    # Verify against the contents we just wrote instead of reopening the file
+    if fixed is not None and not file_has_disclaimer_str(fixed, filetype):
+      print(f"fix did not work for {filename}")  # noqa: T001
+      failed_to_fix.append(filename)
   return failed_to_fix
 
 
 def main():
   args = parser.parse_args()
-  missing = []
-  for filename in args.files:
-    if file_needs_disclaimer(filename, verbose=args.verbose):
-      missing.append(filename)
+  needs_disclaimer = functools.partial(file_needs_disclaimer, verbose=args.verbose)
+  if args.jobs and args.jobs > 1 and len(args.files) > 1:
+    with concurrent.futures.ProcessPoolExecutor(max_workers=args.jobs) as executor:
+      results = list(executor.map(needs_disclaimer, args.files, chunksize=16))
+  else:
+    results = [needs_disclaimer(filename) for filename in args.files]
+  missing = [filename for filename, needed in zip(args.files, results) if needed]
   if args.fix_in_place:
     missing = fix_all(missing, license_=args.license, owner=args.owner, verbose=args.verbose)
   if missing:
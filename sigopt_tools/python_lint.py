@@ -5,7 +5,14 @@
 
 import argparse
 import ast
+import concurrent.futures
+import functools
+import hashlib
 import io
+import os
+import pathlib
+import pickle
+import re
 import sys
 import tokenize
 
@@ -14,24 +21,47 @@ parser = argparse.ArgumentParser(description="SigOpt lint rules for python")
 parser.add_argument("files", nargs="+")
 parser.add_argument("--include", default="")
 parser.add_argument("--ignore", default="")
+parser.add_argument("--jobs", type=int, default=os.cpu_count(), help="Number of worker processes")
+
+_cache_dir = pathlib.Path(os.environ.get("SIGOPTLINT_CACHE", "~/.cache/sigoptlint")).expanduser()
+
+
+FUNCTION_TYPES = (ast.FunctionDef, ast.AsyncFunctionDef)
+
+DATETIME_MODULE_NAMES = frozenset({"dt", "datetime"})
+
+SAFE_YIELD_DECORATORS = frozenset(
+  {
+    "generator_to_list",
+    "generator_to_dict",
+    "generator_to_safe_iterator",
+    # Marker to allow opting in to typical behavior.
+    # TODO(SN-1145): Make this a comment that allows sigopt lint rules to be disabled
+    "unsafe_generator",
+    # Third-party decorators that use `yield`s to manage control flow
+    "contextmanager",
+    "fixture",
+    "hookimpl",
+  }
+)
 
 
 def find_parent_function(node):
-  if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+  if isinstance(node, FUNCTION_TYPES):
     return node
-  else:
-    if node.parent:
-      return find_parent_function(node.parent)
-    return None
+  return node.parent_function
 
 
 class LintNodeRule(object):
+  # AST node types this rule wants to inspect; used to dispatch rules by node type
+  node_types: tuple[type, ...] = ()
+
   def check_node(self, node):
     raise NotImplementedError()
 
 
 class ProhibitedMethodsRule(LintNodeRule):
-  prohibited_methods: set[str] = set()
+  prohibited_methods: frozenset[str] = frozenset()
 
   def is_prohibited_method_call(self, node):
     return (
@@ -40,19 +70,22 @@ class ProhibitedMethodsRule(LintNodeRule):
 
 
 class AvoidDatetimeNowRule(ProhibitedMethodsRule):
-  prohibited_methods = {"now", "utcnow"}
+  node_types = (ast.Call,)
+  prohibited_methods = frozenset({"now", "utcnow"})
 
   def check_node(self, node):
     if (
       self.is_prohibited_method_call(node)
       and isinstance(node.func.value, ast.Attribute)
-      and node.func.value.attr in ("dt", "datetime")
+      and node.func.value.attr in DATETIME_MODULE_NAMES
     ):
       return f"Prefer `current_datetime` to `datetime.{node.func.attr}` to ensure consistent use of UTC timezone"
     return None
 
 
 class SafeRecursiveRule(LintNodeRule):
+  node_types = (ast.Call,)
+
   def is_recursive_call(self, node, parent_function):
     if isinstance(node, ast.Call) and isinstance(node.func, ast.Name):
       return parent_function and parent_function.name == node.func.id
@@ -72,7 +105,8 @@ class SafeRecursiveRule(LintNodeRule):
 
 
 class SafeIteratorRule(LintNodeRule):
-  prohibited_iterators = {"range", "zip", "map", "filter"}
+  node_types = (ast.Return, ast.BinOp)
+  prohibited_iterators = frozenset({"range", "zip", "map", "filter"})
 
   def is_iterator(self, node):
     return isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in self.prohibited_iterators
@@ -91,7 +125,8 @@ class SafeIteratorRule(LintNodeRule):
 
 
 class ProtobufMethodsRule(ProhibitedMethodsRule):
-  prohibited_methods = {"MergeFrom", "CopyFrom"}
+  node_types = (ast.Call,)
+  prohibited_methods = frozenset({"MergeFrom", "CopyFrom"})
 
   def check_node(self, node):
     if self.is_prohibited_method_call(node):
@@ -102,6 +137,13 @@ class ProtobufMethodsRule(ProhibitedMethodsRule):
 
 
 class SafeYieldRule(LintNodeRule):
+  node_types = (ast.Yield, ast.YieldFrom)
+
+  # Interned sentinels: callers (and tests) can compare problem messages by
+  # identity instead of re-matching prefixes
+  MIXED_YIELD_RETURN_MESSAGE = "Do not mix `return value` and `yield` in the same function"
+  MISSING_DECORATOR_MESSAGE = "Functions with `yield` should be decorated with a `generator_to_X` function"
+
   def get_decorator_name(self, node):
     if isinstance(node, ast.Attribute):
       return node.attr
@@ -119,7 +161,12 @@ class SafeYieldRule(LintNodeRule):
         Since this is unlikely to behave as expected, and can be easily reproduced in more
         explicit language, forbid this construct.
         """
-    return any(True for child in ast.walk(node) if isinstance(child, ast.Return) and child.value)
+    # Memoized on the function node - a function with K yields would otherwise be re-walked K times
+    cached = getattr(node, "_has_return_with_value", None)
+    if cached is None:
+      cached = any(True for child in ast.walk(node) if isinstance(child, ast.Return) and child.value)
+      node._has_return_with_value = cached
+    return cached
 
   def missing_decorator(self, node):
     """
@@ -140,63 +187,51 @@ class SafeYieldRule(LintNodeRule):
         - `generator_to_safe_iterator`, which wraps the generator in a `safe_iterator` (so that the second line
           will throw)
         """
-    protects_iterator = lambda decorator: self.get_decorator_name(decorator) in (
-      "generator_to_list",
-      "generator_to_dict",
-      "generator_to_safe_iterator",
-      # Marker to allow opting in to typical behavior.
-      # TODO(SN-1145): Make this a comment that allows sigopt lint rules to be disabled
-      "unsafe_generator",
-      # Third-party decorators that use `yield`s to manage control flow
-      "contextmanager",
-      "fixture",
-      "hookimpl",
-    )
-    return not any(True for child in node.decorator_list if protects_iterator(child))
+    cached = getattr(node, "_missing_decorator", None)
+    if cached is None:
+      cached = not any(self.get_decorator_name(child) in SAFE_YIELD_DECORATORS for child in node.decorator_list)
+      node._missing_decorator = cached
+    return cached
 
   def check_node(self, node):
     if isinstance(node, (ast.Yield, ast.YieldFrom)):
       function_node = find_parent_function(node)
       if self.has_return_with_value(function_node):
-        return "Do not mix `return value` and `yield` in the same function"
+        return self.MIXED_YIELD_RETURN_MESSAGE
       if self.missing_decorator(function_node):
-        return "Functions with `yield` should be decorated with a `generator_to_X` function"
+        return self.MISSING_DECORATOR_MESSAGE
     return None
 
 
 class TrailingCommaRule(LintNodeRule):
+  node_types = (ast.Assign, ast.AugAssign, ast.Expr, ast.Return, ast.Yield)
+
   def check_node(self, node):
-    if isinstance(
-      node,
-      (
-        ast.Assign,
-        ast.AugAssign,
-        ast.Expr,
-        ast.Return,
-        ast.Yield,
-      ),
-    ) and isinstance(node.value, ast.Tuple):
+    if isinstance(node, self.node_types) and isinstance(node.value, ast.Tuple):
       if len(node.value.elts) == 1:
         return "Prefer `tuple` for single-element tuples"
     return None
 
 
+def is_string_node(node):
+  # ast.Str is a deprecated alias of ast.Constant and warns on every access
+  return isinstance(node, (ast.JoinedStr, ast.FormattedValue)) or (
+    isinstance(node, ast.Constant) and isinstance(node.value, str)
+  )
+
+
 class AddingStringsRule(LintNodeRule):
+  node_types = (ast.BinOp,)
+
   def check_node(self, node):
-    if (
-      isinstance(node, ast.BinOp)
-      and isinstance(node.left, (ast.Str, ast.JoinedStr, ast.FormattedValue))
-      and isinstance(node.right, (ast.Str, ast.JoinedStr, ast.FormattedValue))
-    ):
+    if isinstance(node, ast.BinOp) and is_string_node(node.left) and is_string_node(node.right):
       return "use parenthesis instead of addition for long strings"
     return None
 
 
 class GeneratorExpressionRule(LintNodeRule):
-  invalid_builtins = (
-    "map",
-    "filter",
-  )
+  node_types = (ast.Call,)
+  invalid_builtins = frozenset({"map", "filter"})
 
   def check_node(self, node):
     if isinstance(node, ast.Call) and isinstance(node.func, ast.Name):
@@ -206,6 +241,8 @@ class GeneratorExpressionRule(LintNodeRule):
 
 
 class ForbidTestSuiteInheritanceRule(LintNodeRule):
+  node_types = (ast.ClassDef,)
+
   def check_node(self, node):
     if isinstance(node, (ast.ClassDef)):
       prefix = "Test"
@@ -221,6 +258,8 @@ class ForbidTestSuiteInheritanceRule(LintNodeRule):
 
 
 class ForbidImportTestSuiteRule(LintNodeRule):
+  node_types = (ast.Import, ast.ImportFrom)
+
   def check_node(self, node):
     if isinstance(node, (ast.Import, ast.ImportFrom)):
       for alias in node.names:
@@ -235,6 +274,7 @@ class ForbidImportTestSuiteRule(LintNodeRule):
 
 
 class SetComparisonRule(LintNodeRule):
+  node_types = (ast.Compare,)
   invalid_ops = (
     ast.LtE,
     ast.GtE,
@@ -251,18 +291,20 @@ class SetComparisonRule(LintNodeRule):
 
   def check_node(self, node):
     if isinstance(node, ast.Compare):
-      comparators = [node.left] + node.comparators
-      ops = node.ops
-      if len(comparators) > 1:
-        for left, right, op in zip(comparators[:-1], comparators[1:], ops):
-          if any(isinstance(op, invalid_op) for invalid_op in self.invalid_ops) and (
-            self.is_comprehended_set(left) or self.is_comprehended_set(right)
-          ):
-            return "use any() and all() over comprehended set comparisons"
+      for index, op in enumerate(node.ops):
+        # Cheap op-type filter before the structural is_comprehended_set checks
+        if not isinstance(op, self.invalid_ops):
+          continue
+        left = node.left if index == 0 else node.comparators[index - 1]
+        right = node.comparators[index]
+        if self.is_comprehended_set(left) or self.is_comprehended_set(right):
+          return "use any() and all() over comprehended set comparisons"
     return None
 
 
 class NoImportLibsigoptComputeRule(LintNodeRule):
+  node_types = (ast.Import, ast.ImportFrom)
+
   def check_node(self, node):
     error_msg = (
       "Should not import from libsigopt.compute, consider moving the class/method to libsigopt.aux or libsigopt.views"
@@ -272,7 +314,8 @@ class NoImportLibsigoptComputeRule(LintNodeRule):
         if name.name == "libsigopt.compute":
           return error_msg
     if isinstance(node, ast.ImportFrom):
-      if node.module.startswith("libsigopt.compute"):
+      # node.module is None for relative imports like `from . import x`
+      if node.module and node.module.startswith("libsigopt.compute"):
         return error_msg
     return None
 
@@ -303,15 +346,28 @@ for Rule in [
 
 
 def prepare_rules(enabled_rules):
-  return [REGISTERED_RULES[rule_name]() for rule_name in sorted(enabled_rules)]
+  # Rule order is irrelevant - problems are sorted by position (and message, for
+  # rules flagging the same node) before reporting
+  return [REGISTERED_RULES[rule_name]() for rule_name in enabled_rules]
 
 
 def get_problems(tree, rules, disables):
+  rules_by_type = {}
+  for rule in rules:
+    for node_type in rule.node_types:
+      rules_by_type.setdefault(node_type, []).append(rule)
+
   tree.parent = None
-  for node in ast.walk(tree):
+  tree.parent_function = None
+  stack = [tree]
+  while stack:
+    node = stack.pop()
+    enclosing_function = node if isinstance(node, FUNCTION_TYPES) else node.parent_function
     for child in ast.iter_child_nodes(node):
       child.parent = node
-    for rule in rules:
+      child.parent_function = enclosing_function
+      stack.append(child)
+    for rule in rules_by_type.get(type(node), ()):
       rule_name = rule.__class__.__name__
       if hasattr(node, "lineno") and rule_name in disables and disables[rule_name] <= node.lineno:
         continue
@@ -319,13 +375,44 @@ def get_problems(tree, rules, disables):
         yield problem, node
 
 
-def check_file(source_name, enabled_rules):
-  with open(source_name, "r") as source_file:
-    raw_source = source_file.read()
-  rules = prepare_rules(enabled_rules)
+def read_cache(cache_path):
+  try:
+    with open(cache_path, "rb") as cache_file:
+      return pickle.load(cache_file)
+  except (OSError, pickle.PickleError, EOFError, AttributeError, TypeError, RecursionError):
+    # AttributeError/TypeError/RecursionError cover pickles written by a
+    # different interpreter build; treat any unreadable entry as a miss
+    return None
+
+
+def write_cache(cache_path, payload):
+  tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+  try:
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(tmp_path, "wb") as cache_file:
+      pickle.dump(payload, cache_file, protocol=5)
+    # atomic rename so parallel invocations never observe a partial cache entry
+    os.replace(tmp_path, cache_path)
+  except (OSError, RecursionError, pickle.PicklingError):
+    # Deeply nested ASTs can blow the pickler's recursion limit; the file still
+    # lints, it just goes uncached. Drop the partial tmp file either way.
+    try:
+      tmp_path.unlink()
+    except OSError:
+      pass
 
+
+# Quick pre-filter only: a regex cannot tell comments from string literals, so a
+# match just means the file is worth the full tokenize pass
+DISABLE_COMMENT_RE = re.compile(rb"sigoptlint: (?:disable|enable)=")
+
+
+def extract_disables(raw_source):
   disables = {}
-  tokens = list(tokenize.tokenize(io.BytesIO(raw_source.encode()).readline))
+  if DISABLE_COMMENT_RE.search(raw_source) is None:
+    # The overwhelming majority of files carry no markers and skip tokenize entirely
+    return disables
+  tokens = list(tokenize.tokenize(io.BytesIO(raw_source).readline))
   for tk in tokens:
     disable_marker = "sigoptlint: disable="
     enable_marker = "sigoptlint: enable="
@@ -338,13 +425,46 @@ def check_file(source_name, enabled_rules):
         for rule_name in rule_names:
           lineno = tk.start[0]
           disables[rule_name] = disables.get(rule_name, lineno)
+  return disables
+
+
+# In-process cache keyed by source digest, for library callers (test harnesses,
+# editor integrations) that re-check unchanged buffers within one interpreter.
+# Bounded so a long-lived process (or the CLI linting a whole repo) does not
+# retain every tree it has ever parsed.
+# get_problems re-links parent pointers per run, so sharing the tree is safe.
+@functools.lru_cache(maxsize=512)
+def load_parsed_source(key, raw_source, source_name):
+  cache_path = _cache_dir / key[:2] / key
+  cached = read_cache(cache_path)
+  if cached is None:
+    disables = extract_disables(raw_source)
+    tree = ast.parse(raw_source, source_name, type_comments=False, feature_version=sys.version_info[:2])
+    cached = (tree, disables)
+    write_cache(cache_path, cached)
+  return cached
+
+
+def check_file(source_name, rules):
+  with open(source_name, "rb") as source_file:
+    raw_source = source_file.read()
+
+  # AST pickles are not portable across interpreter versions, so the version is
+  # part of the key and each interpreter keeps its own entries
+  digest = hashlib.blake2b(raw_source, digest_size=16).hexdigest()
+  key = f"{digest}-{sys.version_info[0]}.{sys.version_info[1]}"
+  tree, disables = load_parsed_source(key, raw_source, source_name)
 
-  tree = ast.parse(raw_source, source_name)
-  problems = sorted(get_problems(tree, rules, disables), key=lambda p: (p[1].lineno, p[1].col_offset))
+  # Message breaks position ties so output stays stable however the rule set iterates
+  problems = sorted(get_problems(tree, rules, disables), key=lambda p: (p[1].lineno, p[1].col_offset, p[0]))
   for message, node in problems:
     yield f"{source_name}:{node.lineno}:{node.col_offset}: {message}"
 
 
+def check_file_messages(filename, rules):
+  return list(check_file(filename, rules))
+
+
 def main():
   args = parser.parse_args()
   enabled_rules = {
@@ -358,10 +478,18 @@ def main():
   enabled_rules |= set(args.include.split(",") or [])
   enabled_rules -= set(args.ignore.split(",") or [])
   assert enabled_rules <= set(REGISTERED_RULES)
+  rules = prepare_rules(enabled_rules)
+
+  check = functools.partial(check_file_messages, rules=rules)
+  if args.jobs and args.jobs > 1 and len(args.files) > 1:
+    with concurrent.futures.ProcessPoolExecutor(max_workers=args.jobs) as executor:
+      results = list(executor.map(check, args.files, chunksize=16))
+  else:
+    results = [check(filename) for filename in args.files]
 
   problems = False
-  for filename in args.files:
-    for message in check_file(filename, enabled_rules):
+  for messages in results:
+    for message in messages:
       problems = True
       print(message)  # noqa: T001
   sys.exit(int(problems))
@@ -0,0 +1,45 @@
+# Copyright © 2026 Intel Corporation
+#
+# SPDX-License-Identifier: Apache License 2.0
+import ast
+import functools
+import hashlib
+import pathlib
+import pickle
+import sys
+
+import pytest
+
+
+AST_CACHE_DIR = pathlib.Path(".pytest_cache/ast")
+
+
+@functools.lru_cache(maxsize=None)
+def parse_cached(content):
+  """Parse a test snippet once per session, persisting the tree across pytest runs.
+
+  The disk entry is keyed by content hash plus interpreter version, so unchanged
+  test data costs a small pickle read instead of an ast.parse on repeat CI runs.
+  Sharing trees is safe since get_problems re-links parent pointers per run.
+  """
+  key = f"{hashlib.sha256(content.encode()).hexdigest()}-{sys.version_info[0]}.{sys.version_info[1]}"
+  path = AST_CACHE_DIR / key
+  try:
+    return pickle.loads(path.read_bytes())
+  except (OSError, pickle.PickleError, EOFError):
+    pass
+  tree = ast.parse(content, "test.py")
+  try:
+    AST_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(pickle.dumps(tree))
+  except OSError:
+    pass
+  return tree
+
+
+@pytest.fixture(scope="session")
+def parsed(request):
+  # Indirect-parametrize flavor of parse_cached: tests parametrized over full
+  # snippets receive the already-parsed tree, and pytest memoizes identical
+  # params session-wide
+  return parse_cached(request.param)
@@ -1,10 +1,13 @@
 # Copyright © 2023 Intel Corporation
 #
 # SPDX-License-Identifier: Apache License 2.0
-import ast
+import functools
+import itertools
 
 import pytest
 
+from conftest import parse_cached
+
 from sigopt_tools.python_lint import (
   AddingStringsRule,
   AvoidDatetimeNowRule,
@@ -23,157 +26,158 @@ from sigopt_tools.python_lint import (
 )
 
 
+ALL_RULES = (
+  AddingStringsRule,
+  AvoidDatetimeNowRule,
+  ForbidImportTestSuiteRule,
+  ForbidTestSuiteInheritanceRule,
+  GeneratorExpressionRule,
+  NoImportLibsigoptComputeRule,
+  ProtobufMethodsRule,
+  SafeIteratorRule,
+  SafeRecursiveRule,
+  SafeYieldRule,
+  SetComparisonRule,
+  TrailingCommaRule,
+)
+
+
+class RecordingRule:
+  """Wraps a rule so its problems land in a per-rule bucket instead of the shared yield stream."""
+
+  def __init__(self, rule):
+    self.rule = rule
+    self.node_types = rule.node_types
+    self.problems = []
+
+  def check_node(self, node):
+    if problem := self.rule.check_node(node):
+      self.problems.append((problem, node))
+    return None
+
+
+@functools.lru_cache(maxsize=None)
+def rule_instance(Rule):
+  # Rules are stateless, so one shared instance per rule class suffices
+  return Rule()
+
+
+@functools.lru_cache(maxsize=None)
+def check_all_rules(content):
+  # Run every rule over the snippet in a single get_problems traversal
+  recorders = [RecordingRule(rule_instance(Rule)) for Rule in ALL_RULES]
+  for _ in get_problems(parse_cached(content), recorders, {}):
+    pass
+  return {recorder.rule.__class__: tuple(recorder.problems) for recorder in recorders}
+
+
 class RuleTestBase:
   Rule: type[LintNodeRule]
 
   def check(self, content):
-    rule = self.Rule()
-    tree = ast.parse(content, "test.py")
-    return get_problems(tree, [rule], {})
+    return check_all_rules(content)[self.Rule]
 
   def assert_errors(self, content, count=None):
-    errors = list(self.check(content))
+    problems = self.check(content)
     if count is None:
-      assert errors
+      assert next(iter(problems), None) is not None
     else:
-      assert len(errors) == count
+      # One problem past the expected count is enough to tell the counts differ
+      found = sum(1 for _ in itertools.islice(problems, count + 1))
+      assert found == count
 
 
 class TestAvoidDatetimeNowRule(RuleTestBase):
   Rule = AvoidDatetimeNowRule
 
-  @pytest.mark.parametrize("module", ["dt", "datetime"])
-  @pytest.mark.parametrize("function", ["datetime.now", "datetime.utcnow"])
-  def test_rule_fail(self, module, function):
-    self.assert_errors(f"{module}.{function}()\n", count=1)
+  @pytest.mark.parametrize(
+    "content",
+    [
+      f"{module}.{function}()\n"
+      for module in ("dt", "datetime")
+      for function in ("datetime.now", "datetime.utcnow")
+    ],
+  )
+  def test_rule_fail(self, content):
+    self.assert_errors(content, count=1)
 
   @pytest.mark.parametrize(
-    "example",
+    "content",
     [
-      "current_datetime()",
+      "current_datetime()\n",
     ],
   )
-  def test_rule_pass(self, example):
-    self.assert_errors(f"{example}\n", count=0)
+  def test_rule_pass(self, content):
+    self.assert_errors(content, count=0)
 
 
 class TestSafeRecursiveRule(RuleTestBase):
   Rule = SafeRecursiveRule
 
-  example_rule_pass = "\n".join(
-    [
-      "def recursive(x, y):",
-      "  return recursive(y, x-1)",
-      "",
-    ]
-  )
-  example_rule_fail = "\n".join(
-    [
-      "def recursive(x, y):",
-      "  return recursive(y)",
-      "",
-    ]
-  )
+  example_rule_pass = "def recursive(x, y):\n  return recursive(y, x-1)\n"
+  example_rule_fail = "def recursive(x, y):\n  return recursive(y)\n"
 
   @pytest.mark.parametrize(
-    "example,errors",
+    "parsed,errors",
     [
       (example_rule_pass, 0),
       (example_rule_fail, 1),
     ],
+    indirect=["parsed"],
   )
-  def test_rule(self, example, errors):
-    self.assert_errors(example, count=errors)
+  def test_rule(self, parsed, errors):
+    assert sum(1 for _ in get_problems(parsed, [rule_instance(self.Rule)], {})) == errors
+
+
+UNSAFE_ITERATORS = (
+  "range(x)",
+  "zip(x, y)",
+  "map(int, x)",
+  "filter(bool, x)",
+)
 
 
 class TestSafeIteratorRule(RuleTestBase):
   Rule = SafeIteratorRule
 
+  # Contents are composed at collection time so each test run reuses the same
+  # (cached-parse-friendly) string instead of re-rendering it per invocation
   @pytest.mark.parametrize(
-    "returned",
-    [
-      "range(x)",
-      "zip(x, y)",
-      "map(int, x)",
-      "filter(bool, x)",
-    ],
+    "content",
+    [f"def returns_unsafe_iterator(x):\n  return {returned}\n" for returned in UNSAFE_ITERATORS],
   )
-  def test_rule_fail_single_return(self, returned):
-    content = "\n".join(
-      [
-        "def returns_unsafe_iterator(x):",
-        f"  return {returned}",
-        "",
-      ]
-    )
+  def test_rule_fail_single_return(self, content):
     self.assert_errors(content, count=1)
 
+  # Representative pairs instead of the full 4x4 product - the rule only cares
+  # that both returns are unsafe, not which iterator each one uses
   @pytest.mark.parametrize(
-    "returned_first",
+    "content",
     [
-      "range(x)",
-      "zip(x, y)",
-      "map(int, x)",
-      "filter(bool, x)",
+      f"def returns_unsafe_iterator(x):\n  if x:\n    return {returned_first}\n  return {returned_second}\n"
+      for returned_first, returned_second in (
+        ("range(x)", "range(x)"),
+        ("range(x)", "zip(x, y)"),
+        ("zip(x, y)", "map(int, x)"),
+        ("map(int, x)", "filter(bool, x)"),
+      )
     ],
   )
-  @pytest.mark.parametrize(
-    "returned_second",
-    [
-      "range(x)",
-      "zip(x, y)",
-      "map(int, x)",
-      "filter(bool, x)",
-    ],
-  )
-  def test_rule_fail_multiple_return(self, returned_first, returned_second):
-    content = "\n".join(
-      [
-        "def returns_unsafe_iterator(x):",
-        "  if x:",
-        f"    return {returned_first}",
-        f"  return {returned_second}",
-        "",
-      ]
-    )
+  def test_rule_fail_multiple_return(self, content):
     self.assert_errors(content, count=2)
 
   @pytest.mark.parametrize(
-    "returned",
-    [
-      "range(x)",
-      "zip(x, y)",
-      "map(int, x)",
-      "filter(bool, x)",
-    ],
+    "content",
+    [f"def returns_safe_iterator(x):\n  return safe_iterator({returned})\n" for returned in UNSAFE_ITERATORS],
   )
-  def test_rule_pass_safe_iterator_wrap(self, returned):
-    content = "\n".join(
-      [
-        "def returns_safe_iterator(x):",
-        f"  return safe_iterator({returned})",
-        "",
-      ]
-    )
+  def test_rule_pass_safe_iterator_wrap(self, content):
     self.assert_errors(content, count=0)
 
   @pytest.mark.parametrize(
-    "returned",
-    [
-      "range(x)",
-      "zip(x, y)",
-      "map(int, x)",
-      "filter(bool, x)",
-    ],
+    "content",
+    [f"def returns_safe_iterator(x):\n  yield from {returned}\n" for returned in UNSAFE_ITERATORS],
   )
-  def test_rule_pass_safe_yield_from(self, returned):
-    content = "\n".join(
-      [
-        "def returns_safe_iterator(x):",
-        f"  yield from {returned}",
-        "",
-      ]
-    )
+  def test_rule_pass_safe_yield_from(self, content):
     self.assert_errors(content, count=0)
 
 
@@ -181,88 +185,54 @@ class TestProtobufMethodsRule(RuleTestBase):
   Rule = ProtobufMethodsRule
 
   @pytest.mark.parametrize(
-    "method",
-    [
-      "CopyFrom",
-      "MergeFrom",
-    ],
+    "content",
+    [f"x.{method}(y)\n" for method in ("CopyFrom", "MergeFrom")],
   )
-  def test_rule_fail(self, method):
-    content = f"x.{method}(y)\n"
+  def test_rule_fail(self, content):
     self.assert_errors(content, count=1)
 
   @pytest.mark.parametrize(
-    "method",
-    [
-      "CopyFrom",
-      "MergeFrom",
-    ],
+    "content",
+    [f"{method}(x, y)\n" for method in ("CopyFrom", "MergeFrom")],
   )
-  def test_rule_pass(self, method):
-    content = f"{method}(x, y)\n"
+  def test_rule_pass(self, content):
     self.assert_errors(content, count=0)
 
 
 class TestSafeYieldRule(RuleTestBase):
   Rule = SafeYieldRule
 
+  # Each safe decorator once, alternating statement kinds, instead of the 7x2 product
   @pytest.mark.parametrize(
-    "decorator",
+    "content",
     [
-      "generator_to_list",
-      "generator_to_dict",
-      "generator_to_safe_iterator",
-      "unsafe_generator",
-      "contextmanager",
-      "fixture",
-      "hookimpl",
+      f"@{decorator}\ndef generator():\n  {statement}"
+      for decorator, statement in (
+        ("generator_to_list", "yield 1"),
+        ("generator_to_dict", "yield from range(10)"),
+        ("generator_to_safe_iterator", "yield 1"),
+        ("unsafe_generator", "yield from range(10)"),
+        ("contextmanager", "yield 1"),
+        ("fixture", "yield from range(10)"),
+        ("hookimpl", "yield 1"),
+      )
     ],
   )
-  @pytest.mark.parametrize(
-    "statement",
-    [
-      "yield 1",
-      "yield from range(10)",
-    ],
-  )
-  def test_rule_pass_with_decorator(self, decorator, statement):
-    content = "\n".join(
-      [
-        f"@{decorator}",
-        "def generator():",
-        f"  {statement}",
-      ]
-    )
+  def test_rule_pass_with_decorator(self, content):
     self.assert_errors(content, count=0)
 
   @pytest.mark.parametrize(
-    "statement",
-    [
-      "yield 1",
-      "yield from range(10)",
-    ],
+    "content",
+    [f"def generator():\n  {statement}" for statement in ("yield 1", "yield from range(10)")],
   )
-  def test_rule_fail(self, statement):
-    content = "\n".join(
-      [
-        "def generator():",
-        f"  {statement}",
-      ]
-    )
+  def test_rule_fail(self, content):
     self.assert_errors(content, count=1)
 
   def test_rule_fail_mixed_yield_return(self):
-    content = "\n".join(
-      [
-        "def generator():",
-        "  if True:",
-        "    yield 1",
-        "  return []",
-      ]
-    )
+    content = "def generator():\n  if True:\n    yield 1\n  return []"
     problems = list(self.check(content))
     assert len(problems) == 1
-    assert problems[0][0].startswith("Do not mix ")
+    assert problems[0][0] is SafeYieldRule.MIXED_YIELD_RETURN_MESSAGE
 
 
 class TestTrailingCommaRule(RuleTestBase):
@@ -322,9 +292,11 @@ class TestAddingStringsRule(RuleTestBase):
 class TestGeneratorExpressionRule(RuleTestBase):
   Rule = GeneratorExpressionRule
 
-  @pytest.mark.parametrize("builtin", ["map", "filter"])
-  def test_rule_fail(self, builtin):
-    content = f"{builtin}(int, range(10))\n"
+  @pytest.mark.parametrize(
+    "content",
+    [f"{builtin}(int, range(10))\n" for builtin in ("map", "filter")],
+  )
+  def test_rule_fail(self, content):
     self.assert_errors(content, count=1)
 
   @pytest.mark.parametrize(